@@ -0,0 +1,116 @@
+# asset_bundle.py
+
+import io, json, mmap, os, struct, requests
+
+# Bundle layout: header (magic + index size), JSON index, then the assets back to back.
+# The index maps each asset's file name to [offset, length], with offsets relative to the data section.
+MAGIC = b"IMGBNDL1"
+HEADER = struct.Struct("<8sQ")
+
+class AssetBundle:
+    """Read-only, memory-mapped view of a packed playlist bundle"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._map)
+
+        try:
+            magic, index_size = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an asset bundle")
+
+            data_start = HEADER.size + index_size
+            index = json.loads(bytes(self._view[HEADER.size:data_start]).decode("utf-8"))
+            self.entries = {
+                name: (data_start + offset, length) for name, (offset, length) in index.items()
+            }
+
+            if any(start + length > len(self._map) for start, length in self.entries.values()):
+                raise ValueError(f"{path} is truncated")
+        except Exception:
+            self.close()
+            raise
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def get(self, name):
+        """Return the asset's bytes as a zero-copy memoryview, or None"""
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        start, length = entry
+        return self._view[start:start + length]
+
+    def open(self, name):
+        """Return a file-like reader over the asset, or None"""
+        data = self.get(name)
+        return BundleReader(data) if data is not None else None
+
+    def close(self):
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            pass  # Assets are still being read; the mapping goes away with the last reader
+        self._file.close()
+
+class BundleReader(io.RawIOBase):
+    """Seekable file object over a slice of the mapped bundle, for loaders that want a file"""
+
+    def __init__(self, data):
+        super().__init__()
+        self._data = data
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), len(self._data) - self._pos)
+        if count <= 0:
+            return 0
+        buffer[:count] = self._data[self._pos:self._pos + count]
+        self._pos += count
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._data)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+def fetch_bundle(url, path, chunk_size=1024 * 1024):
+    """Stream a bundle to `path`, resuming a previous partial download if there is one"""
+    partial = path + ".part"
+    offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with requests.get(url, stream=True, headers=headers, timeout=(10, 60)) as response:
+        if response.status_code == 416:
+            pass  # Nothing left to fetch, the partial file is complete
+        else:
+            response.raise_for_status()
+            if offset and response.status_code != 206:
+                offset = 0  # Server ignored the range, start over
+
+            with open(partial, "ab" if offset else "wb") as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    f.write(chunk)
+
+    os.replace(partial, path)
+    return path
@@ -0,0 +1,104 @@
+# audio_ducker.py
+
+import time
+from threading import Thread, Condition
+from config import Config
+import metrics
+
+class BackgroundDucker(Thread):
+    """Fades background music down while media audio plays and back up when it ends.
+
+    Ramps are interpolated against the monotonic clock in small steps (pygame has no
+    per-channel gain automation), and the restore is triggered by the mixer reporting
+    media audio idle rather than by waiting out the clip's expected length.
+    """
+
+    def __init__(self, media_manager):
+        super().__init__(daemon=True)
+        self.media_manager = media_manager
+        self.level = 1.0  # Background volume the user chose
+        self.volume = 1.0  # Background volume right now
+        self.ducked = False
+        self.ramp = None  # (name, started, from, to, duration_ms)
+        self.media_started = False  # Media audio seen playing since the last duck
+        self.duck_requested = 0
+        self.idle_since = None
+        self.cond = Condition()
+
+    def duck(self, volume=None):
+        """Start fading the background down for a media clip"""
+        target = Config.DUCK_VOLUME if volume is None else volume
+        with self.cond:
+            self.ducked = True
+            self.media_started = False
+            self.idle_since = None
+            self.duck_requested = time.monotonic()
+            self._start_ramp("duck", min(target, self.level), Config.DUCK_FADE_MS)
+            self.cond.notify()
+
+    def restore(self, level=None):
+        """Fade the background back to the user's level now"""
+        with self.cond:
+            if level is not None:
+                self.level = level
+            self.ducked = False
+            self._start_ramp("restore", self.level, Config.RESTORE_FADE_MS)
+            self.cond.notify()
+
+    def set_level(self, level):
+        """Change the user's background level; applies at once unless the background is ducked"""
+        with self.cond:
+            self.level = level
+            if not self.ducked:
+                self.ramp = None
+                self._apply(level)
+
+    def _start_ramp(self, name, target, duration_ms):
+        self.ramp = (name, time.monotonic(), self.volume, target, max(duration_ms, 1))
+
+    def _apply(self, volume):
+        self.volume = volume
+        self.media_manager.set_background_volume(volume)
+
+    def run(self):
+        step = Config.RAMP_STEP_MS / 1000
+        poll = Config.MEDIA_POLL_MS / 1000
+        while True:
+            with self.cond:
+                if self.ramp is None and not self.ducked:
+                    self.cond.wait()
+                    continue
+
+                now = time.monotonic()
+                if self.ramp:
+                    name, started, start_volume, target, duration_ms = self.ramp
+                    progress = min((now - started) * 1000 / duration_ms, 1.0)
+                    self._apply(start_volume + (target - start_volume) * progress)
+                    if progress >= 1.0:
+                        self.ramp = None
+                        metrics.record(f"{name}_ramp_time", now - started)
+
+                if self.ducked:
+                    self._check_media(now)
+
+                # Fine steps only while fading; otherwise just watch for the clip to end
+                self.cond.wait(step if self.ramp else poll)
+
+    def _check_media(self, now):
+        busy = self.media_manager.media_busy()
+        if busy:
+            self.media_started = True
+            self.idle_since = None
+            return
+
+        # Give a clip a moment to start before reading silence as its end
+        if not self.media_started and now - self.duck_requested < Config.MEDIA_START_GRACE:
+            return
+
+        if self.idle_since is None:
+            self.idle_since = now
+        elif now - self.idle_since >= Config.RESTORE_DELAY:
+            metrics.record("restore_delay", now - self.idle_since)
+            self.media_manager.media_finished()
+            self.ducked = False
+            self._start_ramp("restore", self.level, Config.RESTORE_FADE_MS)
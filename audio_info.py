@@ -0,0 +1,130 @@
+# audio_info.py
+
+import os, struct, wave
+
+# MPEG audio header tables, indexed by [version][layer]
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_BITRATES[(2, 3)] = _BITRATES[(2, 2)]
+_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 25: [11025, 12000, 8000]}
+
+def duration(source, name=None):
+    """Length in seconds of a WAV, MP3, FLAC or Ogg (Vorbis/Opus) file, read from its headers.
+
+    `source` is a path or a seekable binary file object. Nothing is decoded, so this
+    is cheap for tracks of any length. Returns None for formats it can't read.
+    """
+    name = (name or (source if isinstance(source, str) else "")).lower()
+    f = open(source, "rb") if isinstance(source, str) else source
+    try:
+        f.seek(0)
+        head = f.read(4)
+        f.seek(0)
+        if head == b"RIFF":
+            with wave.open(f, "rb") as w:
+                return w.getnframes() / float(w.getframerate())
+        if head == b"OggS":
+            return _ogg_duration(f)
+        if head == b"fLaC":
+            return _flac_duration(f)
+        if name.endswith(".mp3") or head[:3] == b"ID3" or head[:2] in (b"\xff\xfb", b"\xff\xf3", b"\xff\xf2"):
+            return _mp3_duration(f)
+        return None
+    except (OSError, ValueError, EOFError, struct.error, wave.Error):
+        return None
+    finally:
+        if isinstance(source, str):
+            f.close()
+        else:
+            f.seek(0)  # Leave a caller's file ready for the decoder
+
+def _size(f):
+    f.seek(0, os.SEEK_END)
+    return f.tell()
+
+def _mp3_duration(f):
+    size = _size(f)
+    f.seek(0)
+    start = 0
+    header = f.read(10)
+    if header[:3] == b"ID3":
+        tag_size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        start = 10 + tag_size + (10 if header[5] & 0x10 else 0)
+
+    # Find the first frame header
+    f.seek(start)
+    data = f.read(64 * 1024)
+    for i in range(len(data) - 4):
+        if data[i] == 0xFF and data[i + 1] & 0xE0 == 0xE0:
+            version_bits = (data[i + 1] >> 3) & 3
+            layer_bits = (data[i + 1] >> 1) & 3
+            bitrate_index = data[i + 2] >> 4
+            rate_index = (data[i + 2] >> 2) & 3
+            if version_bits != 1 and layer_bits != 0 and bitrate_index not in (0, 15) and rate_index != 3:
+                break
+    else:
+        return None
+
+    version = {3: 1, 2: 2, 0: 25}[version_bits]
+    layer = 4 - layer_bits
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    bitrate = _BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    samples_per_frame = 384 if layer == 1 else (1152 if layer == 2 or version == 1 else 576)
+    mono = (data[i + 3] >> 6) == 3
+
+    # VBR files carry a frame count in a Xing/Info or VBRI header inside the first frame
+    side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+    xing = i + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+        if flags & 1:
+            frames = struct.unpack(">I", data[xing + 8:xing + 12])[0]
+            return frames * samples_per_frame / float(sample_rate)
+    vbri = i + 4 + 32
+    if data[vbri:vbri + 4] == b"VBRI":
+        frames = struct.unpack(">I", data[vbri + 14:vbri + 18])[0]
+        return frames * samples_per_frame / float(sample_rate)
+
+    # Constant bitrate: work it out from the size of the audio data
+    audio_bytes = size - start - i
+    f.seek(size - 128)
+    if f.read(3) == b"TAG":
+        audio_bytes -= 128
+    return audio_bytes * 8 / float(bitrate)
+
+def _ogg_duration(f):
+    first = f.read(4096)
+    if b"\x01vorbis" in first:
+        at = first.index(b"\x01vorbis") + 12
+        sample_rate = struct.unpack("<I", first[at:at + 4])[0]
+        pre_skip = 0
+    elif b"OpusHead" in first:
+        at = first.index(b"OpusHead")
+        sample_rate = 48000  # Opus granule positions always count 48 kHz samples
+        pre_skip = struct.unpack("<H", first[at + 10:at + 12])[0]
+    else:
+        return None
+
+    # The last page's granule position is the total sample count
+    size = _size(f)
+    f.seek(max(0, size - 64 * 1024))
+    tail = f.read()
+    last = tail.rfind(b"OggS")
+    if last < 0 or not sample_rate:
+        return None
+    granule = struct.unpack("<q", tail[last + 6:last + 14])[0]
+    return max(granule - pre_skip, 0) / float(sample_rate)
+
+def _flac_duration(f):
+    # STREAMINFO is always the first metadata block
+    info = f.read(42)[8:]
+    sample_rate = (info[10] << 12) | (info[11] << 4) | (info[12] >> 4)
+    samples = ((info[13] & 0x0F) << 32) | struct.unpack(">I", info[14:18])[0]
+    if not sample_rate or not samples:
+        return None
+    return samples / float(sample_rate)
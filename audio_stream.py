@@ -0,0 +1,76 @@
+# audio_stream.py
+
+import wave, pygame
+from threading import Thread, Event
+from config import Config
+
+def matches_mixer(path):
+    """True if `path` is a WAV whose samples can be handed to the mixer as-is"""
+    mixer = pygame.mixer.get_init()
+    if not mixer or not path.lower().endswith(".wav"):
+        return False
+    frequency, size, channels = mixer
+    try:
+        with wave.open(path, "rb") as w:
+            return (w.getframerate() == frequency and w.getnchannels() == channels
+                    and w.getsampwidth() * 8 == abs(size))
+    except (OSError, wave.Error, EOFError):
+        return False
+
+class ChannelStream(Thread):
+    """Plays a mixer-format WAV on a channel a few seconds at a time.
+
+    Only the playing chunk and the queued one are in memory, so long tracks cost a
+    small, fixed buffer instead of their whole decoded length. The channel itself is
+    used as usual, so its volume (ducking, sliders) applies to the stream.
+    """
+
+    def __init__(self, channel, path, loops=0, chunk_seconds=None, on_start=None):
+        super().__init__(daemon=True)
+        self.on_start = on_start  # Called once the first chunk is playing
+        self.channel = channel
+        self.path = path
+        self.loops = loops  # -1 repeats forever, like Channel.play
+        self.chunk_seconds = chunk_seconds or Config.STREAM_CHUNK_SECONDS
+        self._stop_event = Event()
+
+    def run(self):
+        try:
+            with wave.open(self.path, "rb") as w:
+                frames_per_chunk = int(w.getframerate() * self.chunk_seconds)
+                loops_left = self.loops
+
+                chunk = self._read_chunk(w, frames_per_chunk)
+                if chunk is None:
+                    return
+                self.channel.play(chunk)
+                if self.on_start:
+                    self.on_start()
+
+                while not self._stop_event.is_set():
+                    if self.channel.get_queue() is None:
+                        chunk = self._read_chunk(w, frames_per_chunk)
+                        if chunk is None:
+                            if loops_left == 0:
+                                break
+                            loops_left -= 1 if loops_left > 0 else 0
+                            w.rewind()
+                            continue
+                        self.channel.queue(chunk)
+
+                    # Top up well before the playing chunk runs out
+                    self._stop_event.wait(self.chunk_seconds / 4)
+        except Exception as e:
+            print(f"Error streaming audio {self.path}: {e}")
+
+    @staticmethod
+    def _read_chunk(w, frames):
+        data = w.readframes(frames)
+        if not data:
+            return None
+        return pygame.mixer.Sound(buffer=data)
+
+    def stop(self):
+        """Stop feeding the channel and silence it"""
+        self._stop_event.set()
+        self.channel.stop()
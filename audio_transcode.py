@@ -0,0 +1,73 @@
+# audio_transcode.py
+
+import json, os, threading, wave, pygame
+from config import Config
+
+_index_lock = threading.Lock()
+
+def _load_index():
+    try:
+        with open(Config.TRANSCODE_INDEX, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def cached_duration(path):
+    """Duration in seconds recorded for a transcoded clip, or None"""
+    with _index_lock:
+        return _load_index().get(os.path.basename(path))
+
+def transcoded_path(name):
+    """Where the mixer-format copy of `name` lives for the current mixer settings, or None"""
+    mixer = pygame.mixer.get_init()
+    if not mixer:
+        return None
+    frequency, size, channels = mixer
+    if size not in (-16, 8):
+        return None  # The wave module writes signed 16-bit or unsigned 8-bit PCM only
+
+    # Keep the source extension so clip.mp3 and clip.ogg get separate copies and index entries
+    return os.path.join(Config.TRANSCODE_DIR, f"{name}.{frequency}Hz{abs(size)}b{channels}ch.wav")
+
+def transcode_for_mixer(name, source, source_mtime=0):
+    """Decode a clip once and cache it as PCM WAV in the mixer's own format.
+
+    `source` is a path or file object. Returns (path, duration); loading the WAV later
+    needs no decoding or resampling. A copy older than its source is regenerated.
+    """
+    path = transcoded_path(name)
+    if path is None:
+        return None, None
+    if isinstance(source, str):
+        source_mtime = os.path.getmtime(source)
+
+    if os.path.exists(path) and os.path.getmtime(path) >= source_mtime:
+        duration = cached_duration(path)
+        if duration is not None:
+            return path, duration
+
+    # pygame hands back the samples already converted to the mixer format
+    sound = pygame.mixer.Sound(source) if isinstance(source, str) else pygame.mixer.Sound(file=source)
+    frequency, size, channels = pygame.mixer.get_init()
+    duration = sound.get_length()
+
+    temp = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with wave.open(temp, "wb") as w:
+            w.setnchannels(channels)
+            w.setsampwidth(abs(size) // 8)
+            w.setframerate(frequency)
+            w.writeframes(sound.get_raw())
+        os.replace(temp, path)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)  # Left behind only if writing failed
+
+    with _index_lock:
+        index = _load_index()
+        index[os.path.basename(path)] = duration
+        with open(Config.TRANSCODE_INDEX + ".tmp", "w") as f:
+            json.dump(index, f)
+        os.replace(Config.TRANSCODE_INDEX + ".tmp", Config.TRANSCODE_INDEX)
+
+    return path, duration
@@ -0,0 +1,117 @@
+# cache_manifest.py
+
+import hashlib, json, os, threading, uuid
+from config import Config
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    """Content hash of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class CacheManifest:
+    """Record of every cached asset: file name -> url, local path, sha256 and size.
+
+    Changes are written to disk a few seconds after a burst of them rather than one
+    rewrite per asset, and peers can ask for just the entries changed since the
+    version they last read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.version = 0  # Bumped on every change, so peers know when to re-read it
+        self.epoch = uuid.uuid4().hex  # Versions only compare within one run of the process
+        self.changed = {}  # name -> version it last changed at, removed names included
+        self.dirty = False
+        self._save_timer = None
+        try:
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, name):
+        with self.lock:
+            return self.entries.get(name)
+
+    def path_for_hash(self, sha256):
+        """Local path of the cached file with this content hash, or None"""
+        with self.lock:
+            for entry in self.entries.values():
+                if entry["sha256"] == sha256 and os.path.exists(entry["path"]):
+                    return entry["path"]
+        return None
+
+    def add(self, name, url, path, sha256=None):
+        """Record a cached file, hashing it if the hash isn't already known"""
+        entry = {
+            "url": url,
+            "path": path,
+            "sha256": sha256 or sha256_file(path),
+            "size": os.path.getsize(path),
+        }
+        with self.lock:
+            self.entries[name] = entry
+            self._changed(name)
+        return entry
+
+    def remove(self, name):
+        with self.lock:
+            if self.entries.pop(name, None) is not None:
+                self._changed(name)
+
+    def snapshot(self, since=None, epoch=None):
+        """Name -> {sha256, size} for sharing with peers.
+
+        Given the `since` version and `epoch` of a previous snapshot, only names changed
+        after it are included, with None for removed ones. Returns
+        {"epoch", "version", "full", "entries"}.
+        """
+        with self.lock:
+            full = since is None or epoch != self.epoch or since > self.version
+            names = self.entries if full else [name for name, version in self.changed.items() if version > since]
+            entries = {}
+            for name in names:
+                entry = self.entries.get(name)
+                entries[name] = {"sha256": entry["sha256"], "size": entry["size"]} if entry else None
+            return {"epoch": self.epoch, "version": self.version, "full": full, "entries": entries}
+
+    def flush(self):
+        """Write pending changes to disk now"""
+        with self.lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self.dirty:
+                self._save()
+
+    def _changed(self, name):
+        # Called with the lock held
+        self.version += 1
+        self.changed[name] = self.version
+        self.dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(Config.MANIFEST_SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save(self):
+        temp = self.path + ".tmp"
+        with open(temp, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(temp, self.path)
+        self.dirty = False
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_manifest():
+    """The process-wide manifest of Config.CACHE_MANIFEST"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = CacheManifest(Config.CACHE_MANIFEST)
+        return _shared
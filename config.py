@@ -3,16 +3,90 @@ import os, sys
 
 class Config:
     API_GET_LATEST_PLAYLIST = "https://cloudbases.in/demoplatform/Robo/Robo_api/api_get_latest_playlist_id/1"
+    API_GET_LATEST_PLAYLIST_FOR_SCREEN = "https://cloudbases.in/demoplatform/Robo/Robo_api/api_get_latest_playlist_id/"
     API_GET_PLAYLIST = "https://cloudbases.in/demoplatform/Robo/Robo_api/api_get_playlist/"
+    API_GET_PLAYLIST_BUNDLE = "https://cloudbases.in/demoplatform/Robo/Robo_api/api_get_playlist_bundle/"
+    # Server-sent events stream announcing playlist changes (override to point at a local stand-in server)
+    API_PLAYLIST_EVENTS = os.environ.get("IMGCALL_PLAYLIST_EVENTS", "https://cloudbases.in/demoplatform/Robo/Robo_api/api_playlist_events/1")
+    API_PLAYLIST_EVENTS_FOR_SCREEN = "https://cloudbases.in/demoplatform/Robo/Robo_api/api_playlist_events/"
+
+    # Playlist change notifications
+    PUSH_CONNECT_TIMEOUT = 5  # Seconds to wait for the event stream to connect
+    PUSH_READ_TIMEOUT = 30  # Seconds without data (or keep-alive) before the stream is considered dead
+    PUSH_RETRY_INTERVAL = 60  # Seconds of polling before trying the event stream again
+    POLL_MIN_INTERVAL = 2  # Fallback polling interval right after a change
+    POLL_MAX_INTERVAL = 60  # Fallback polling backs off up to this interval while nothing changes
+    POLL_JITTER = 0.2  # +/- fraction of random jitter so screens don't poll in lockstep
+
+    # Fetch each playlist as one packed bundle instead of one request per asset
+    USE_ASSET_BUNDLES = False
+
+    # Decode each clip once after download into a WAV matching the mixer format
+    TRANSCODE_AUDIO = False
+
+    # Tracks at least this long (seconds) or large (bytes) are streamed instead of decoded into RAM
+    STREAM_MIN_DURATION = 120
+    STREAM_MIN_BYTES = 4 * 1024 * 1024
+    STREAM_CHUNK_SECONDS = 2  # Decoded audio held per queued chunk while streaming
+
+    # Mixer setup; a small buffer keeps start-to-sound latency low (buffer / frequency seconds)
+    MIXER_FREQUENCY = 44100
+    MIXER_SIZE = -16
+    MIXER_CHANNELS = 2
+    MIXER_BUFFER = 512
+
+    # Background music ducking while media audio plays
+    DUCK_VOLUME = 0.2
+    DUCK_FADE_MS = 300
+    RESTORE_FADE_MS = 1500
+    RESTORE_DELAY = 1.0  # Seconds of media silence before the background comes back up
+    MEDIA_START_GRACE = 2.0  # Seconds to wait for a clip to start before treating silence as its end
+    RAMP_STEP_MS = 10
+    MEDIA_POLL_MS = 100  # How often the mixer is checked for the end of a clip between fades
+
+    # Share cached assets with other screens on the LAN before going to the origin
+    PEER_CACHE_ENABLED = False
+    PEER_GROUP = "239.255.42.99"  # Multicast group peers announce themselves on
+    PEER_PORT = 45299
+    PEER_HTTP_PORT = int(os.environ.get("IMGCALL_PEER_HTTP_PORT", 0))  # 0 picks a free port
+    PEER_ANNOUNCE_INTERVAL = 5
+    PEER_FETCH_TIMEOUT = 30
+    PEER_CLAIM_JITTER = 0.5  # Seconds to collect other screens' claims on a missing asset
+    PEER_CLAIM_WAIT = 30  # How long to wait on the screen downloading it before going to the origin
+
+    PREFETCH_WORKERS = 4  # Parallel downloads in --prefetch mode
+
+    SLIDESHOW_MIN_INTERVAL = 2  # Seconds each image of a multi-image set stays up, at least
+    TRANSITION = "fade"  # "fade" or "cut" between images
+    TRANSITION_MS = 400
+    FRAME_BUDGET_MS = 16  # Fades drop to a cut when a frame takes longer than this to paint
+
+    METRICS_REPORT_INTERVAL = 600  # Seconds between timing reports in the log (also printed on exit), 0 for exit only
+
+    # "single": first monitor only. "mirror": the same playlist on every monitor.
+    # "extend": each monitor plays its own screen's playlist; audio comes from the first one.
+    DISPLAY_MODE = os.environ.get("IMGCALL_DISPLAY_MODE", "single")
+    SCREEN_IDS = [2, 3, 4]  # Backend screen IDs of the second, third, ... monitor in "extend" mode
     
     APP_DIR = os.path.dirname(os.path.abspath(sys.argv[0]))
-    DOWNLOADS_DIR = os.path.join(APP_DIR, "downloads")
+    DOWNLOADS_DIR = os.environ.get("IMGCALL_DOWNLOADS_DIR", os.path.join(APP_DIR, "downloads"))
     AUDIO_DIR = os.path.join(DOWNLOADS_DIR, "audio")
     IMAGES_DIR = os.path.join(DOWNLOADS_DIR, "images")
+    BUNDLES_DIR = os.path.join(DOWNLOADS_DIR, "bundles")
+    DERIVED_DIR = os.path.join(DOWNLOADS_DIR, "derived")  # Display-sized image copies, one folder per resolution
+    TRANSCODE_DIR = os.path.join(DOWNLOADS_DIR, "pcm")  # Mixer-format copies of audio clips
+    TRANSCODE_INDEX = os.path.join(TRANSCODE_DIR, "durations.json")
+    CACHE_MANIFEST = os.path.join(DOWNLOADS_DIR, "manifest.json")  # sha256 and size of every cached asset
+    MANIFEST_SAVE_DELAY = 5  # Seconds of changes gathered into one rewrite of the manifest
     BACKGROUND_MUSIC = os.path.join(DOWNLOADS_DIR, "Beat.mp3")
     BACKGROUND_IMAGE = os.path.join(DOWNLOADS_DIR, "centelonsolutions_logo.png")
     PLAYLIST_DATA = os.path.join(APP_DIR, "playlist_data.json")
+    PLAYLIST_SETS = os.path.join(APP_DIR, "playlist_sets.jsonl")  # One media set per line
+    PLAYLIST_INDEX = os.path.join(APP_DIR, "playlist_sets.idx")  # Byte offset of each line
 
     # Create necessary directories
     os.makedirs(AUDIO_DIR, exist_ok=True)
-    os.makedirs(IMAGES_DIR, exist_ok=True)
\ No newline at end of file
+    os.makedirs(IMAGES_DIR, exist_ok=True)
+    os.makedirs(BUNDLES_DIR, exist_ok=True)
+    os.makedirs(DERIVED_DIR, exist_ok=True)
+    os.makedirs(TRANSCODE_DIR, exist_ok=True)
\ No newline at end of file
@@ -1,26 +1,86 @@
 # gui.py
-from PyQt5.QtWidgets import QMainWindow, QLabel, QVBoxLayout, QWidget, QPushButton, QApplication
-from PyQt5.QtGui import QPixmap, QIcon, QMouseEvent
-from PyQt5.QtCore import Qt, pyqtSignal, QObject, QSize, QTimer
+from PyQt5.QtWidgets import QMainWindow, QGridLayout, QVBoxLayout, QWidget, QPushButton, QApplication
+from PyQt5.QtGui import QImage, QIcon, QMouseEvent
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, QSize, QTimer, QRunnable, QThreadPool
 from config import Config
-from media_manager import MediaManager
 from wifi_control import WiFiSettingsDialog, get_wifi_strength
 from vol_control import VolumeControlWidget
 from message import show_message
+from render_surface import RenderSurface
 from screeninfo import get_monitors
-import os, sys
+from threading import Event, Lock
+import os, sys, time
 
 class UpdateSignal(QObject):
     update_images = pyqtSignal(list)
+    update_slideshow = pyqtSignal(list, float)  # Image URLs, seconds to spread them over
+    frame_ready = pyqtSignal(int, int, object)  # Slideshow generation, slide index, decoded QImage
+
+class FrameDecoder(QRunnable):
+    """Decodes one slide off the GUI thread and hands it back through frame_ready"""
+
+    def __init__(self, viewer, generation, index, url):
+        super().__init__()
+        self.viewer = viewer
+        self.generation = generation
+        self.index = index
+        self.url = url
+
+    def run(self):
+        image = self.viewer.decode_image(self.url)
+        self.viewer.signal.frame_ready.emit(self.generation, self.index, image)
+
+class FrameHandoff:
+    """Hands one decode of a slide to every mirrored viewer of the same size.
+
+    The first viewer to ask decodes it; the image is held until each of the `takers`
+    viewers showing that slide has collected it, then dropped, so nothing beyond the
+    current and next frames stays in memory and a failed load is retried next time.
+    """
+
+    def __init__(self, expire=60):
+        self.lock = Lock()
+        self.entries = {}  # key -> [decoded Event, image, takers left, created]
+        self.expire = expire  # Seconds before a frame nobody else collected is dropped anyway
+
+    def get(self, key, takers, decode):
+        now = time.monotonic()
+        with self.lock:
+            for stale in [k for k, entry in self.entries.items() if now - entry[3] > self.expire]:
+                del self.entries[stale]
+            entry = self.entries.get(key)
+            leader = entry is None
+            if leader:
+                entry = self.entries[key] = [Event(), None, takers, now]
+
+        if leader:
+            try:
+                entry[1] = decode()
+            finally:
+                entry[0].set()
+        else:
+            entry[0].wait()
+
+        with self.lock:
+            entry[2] -= 1
+            if entry[2] <= 0 and self.entries.get(key) is entry:
+                del self.entries[key]
+        return entry[1]
+
+frame_handoff = FrameHandoff()
 
 class ImageViewer(QMainWindow):
-    def __init__(self, media_manager):
+    def __init__(self, media_manager, monitor=None):
         super().__init__()
 
         self.APP_DIR = os.path.dirname(os.path.abspath(sys.argv[0]))
 
-        display_resolution = get_monitors()[0]  # Get the first monitor (if you have multiple, you can iterate)
+        display_resolution = monitor or get_monitors()[0]  # The monitor this viewer fills, the first one by default
         self.media_manager = media_manager
+        self.display_size = (display_resolution.width, display_resolution.height)
+        if not self.media_manager.display_size:
+            self.media_manager.display_size = self.display_size
+        self.move(display_resolution.x, display_resolution.y)  # Go full screen on this monitor
         self.setFixedSize(display_resolution.width,display_resolution.height)
         self.init_ui()
         self.bg_volume = 100  # Default background music volume 
@@ -41,6 +101,17 @@ class ImageViewer(QMainWindow):
         self.mouse_stopped_timer = QTimer(self)
         self.mouse_stopped_timer.setSingleShot(True)
         self.mouse_stopped_timer.timeout.connect(self.hide_buttons)
+
+        # Slideshow state: only the frame on screen and the next decoded one are held
+        self.slides = []
+        self.slide_index = 0  # Slide that should be on screen
+        self.slide_interval = 0  # Milliseconds per slide, 0 for a single still
+        self.slide_generation = 0  # Bumped per media set so late decodes of an old set are dropped
+        self.next_frame = None  # (index, QImage) decoded ahead
+        self.slide_timer = QTimer(self)
+        self.slide_timer.setSingleShot(True)
+        self.slide_timer.timeout.connect(self.advance_slide)
+        self.frame_takers = 1  # Viewers of this size showing the same slides, each decode goes to all of them
         
     def init_ui(self):
         self.setWindowTitle("Image Viewer")
@@ -48,14 +119,12 @@ class ImageViewer(QMainWindow):
         self.showFullScreen()
 
         self.widget = QWidget()
-        self.layout = QVBoxLayout()
+        self.layout = QGridLayout()  # Buttons share the surface's cell, so showing them never resizes it
         self.widget.setStyleSheet("background-color: black;")
 
-         # Add a persistent QLabel for image display
-        self.image_widget = QLabel(self)
-        self.image_widget.setAlignment(Qt.AlignCenter)
-        self.image_widget.setScaledContents(True)
-        self.layout.addWidget(self.image_widget)
+         # Add a persistent render surface for image display
+        self.image_widget = RenderSurface(self)
+        self.layout.addWidget(self.image_widget, 0, 0)
 
         # Volume control button (added directly to layout)
         self.volume_button = QPushButton("", self)
@@ -93,8 +162,8 @@ class ImageViewer(QMainWindow):
         button_layout = QVBoxLayout()
         button_layout.setAlignment(Qt.AlignTop | Qt.AlignRight)  # Position top-right
 
-        # Add the button layout to the main layout
-        self.layout.addLayout(button_layout)
+        # Overlay the button layout on the render surface
+        self.layout.addLayout(button_layout, 0, 0, Qt.AlignTop | Qt.AlignRight)
 
         # Add Wi-Fi Settings Button
         self.wifi_button = QPushButton("", self)
@@ -168,6 +237,8 @@ class ImageViewer(QMainWindow):
         # Signal for updating images
         self.signal = UpdateSignal()
         self.signal.update_images.connect(self.update_image_display)
+        self.signal.update_slideshow.connect(self.start_slideshow)
+        self.signal.frame_ready.connect(self.on_frame_ready)
 
         self.widget.setLayout(self.layout)
         self.setCentralWidget(self.widget)
@@ -181,39 +252,76 @@ class ImageViewer(QMainWindow):
         self.volume_control.show()
     
     def update_image_display(self, image_urls):    
+        self.start_slideshow(image_urls, 0)
+
+    def start_slideshow(self, image_urls, duration):
+        """Show a media set's images one after another, spread over `duration` seconds"""
         if not image_urls:
             image_urls = [Config.BACKGROUND_IMAGE]
-            
-        # Add new images
-        for url in image_urls:
-            pixmap = self.load_image(url)
-            if pixmap:
-                pixmap = pixmap.scaled(self.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-
-                # Ensure the pixmap isn't too large for the widget
-                # Limit the pixmap size to avoid widget expansion
-                max_width = self.width()  # Maximum width of the widget
-                max_height = self.height()  # Maximum height of the widget
-                
-                # Scaling the pixmap to fit the maximum size
-                pixmap = pixmap.scaled(max_width, max_height, Qt.KeepAspectRatio)
-
-                self.image_widget.setPixmap(pixmap)
-                self.image_widget.setAlignment(Qt.AlignCenter)
-                self.image_widget.setScaledContents(True)
-
-                 # Set the size of the image widget to be fixed based on the pixmap size
-                self.image_widget.setFixedSize(pixmap.size())  # Set size based on pixmap's size
-
-    def load_image(self, url):
+
+        self.slide_timer.stop()
+        self.slide_generation += 1
+        self.slides = list(image_urls)
+        self.slide_index = 0
+        self.next_frame = None
+
+        interval = duration / len(self.slides) if len(self.slides) > 1 else 0
+        self.slide_interval = int(max(interval, Config.SLIDESHOW_MIN_INTERVAL) * 1000) if interval else 0
+
+        self.decode_slide(0)
+
+    def decode_slide(self, index):
+        if index < len(self.slides):
+            QThreadPool.globalInstance().start(FrameDecoder(self, self.slide_generation, index, self.slides[index]))
+
+    def on_frame_ready(self, generation, index, image):
+        if generation != self.slide_generation:
+            return  # Left over from a previous media set
+
+        if index == self.slide_index:
+            self.show_slide(image)
+        elif index == self.slide_index + 1:
+            self.next_frame = (index, image)  # Shown when the timer fires
+
+    def advance_slide(self):
+        if self.slide_index + 1 >= len(self.slides):
+            return  # Keep the last image up until the next set
+        self.slide_index += 1
+
+        if self.next_frame and self.next_frame[0] == self.slide_index:
+            _, image = self.next_frame
+            self.next_frame = None
+            self.show_slide(image)
+        # Otherwise the decode is still running and on_frame_ready shows it on arrival
+
+    def show_slide(self, image):
+        self.image_widget.show_frame(image)
+
+        # Decode the following slide while this one is up
+        if self.slide_interval:
+            self.decode_slide(self.slide_index + 1)
+            self.slide_timer.start(self.slide_interval)
+
+    def decode_image(self, url):
+        """Load an image as a QImage, shared with other viewers of this size; safe from worker threads"""
+        return frame_handoff.get((url, self.display_size), self.frame_takers, lambda: self._decode_image(url))
+
+    def _decode_image(self, url):
         try:
-            media_manager = MediaManager()
-            local_path = media_manager.download_image(url)
+            local_path = self.media_manager.display_image(url, self.display_size)
             if local_path:
-                return QPixmap(local_path)
+                image = QImage(local_path)
+                if not image.isNull():
+                    return image
+
+            data = self.media_manager.get_bundled_asset(url)
+            if data is not None:
+                image = QImage.fromData(bytes(data))
+                if not image.isNull():
+                    return image
         except Exception as e:
             print(f"Error loading image: {e}")
-            return QPixmap(Config.BACKGROUND_IMAGE)
+        return QImage(Config.BACKGROUND_IMAGE)
 
     def open_wifi_settings(self):
         wifi_dialog = WiFiSettingsDialog()
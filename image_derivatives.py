@@ -0,0 +1,51 @@
+# image_derivatives.py
+
+import os, threading
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage
+from config import Config
+
+def derivative_path(name, size):
+    """Where the display-sized copy of `name` lives for a given (width, height), minus its format extension"""
+    width, height = size
+    # Keep the source extension so logo.png and logo.jpg never share a slot
+    return os.path.join(Config.DERIVED_DIR, f"{width}x{height}", name)
+
+def make_display_derivative(name, size, source_path=None, data=None, source_mtime=0):
+    """Scale an image once to fit the display and cache it; returns the cached path.
+
+    The copy is stored under a per-resolution directory, so a resolution change simply
+    misses the cache and regenerates. A copy older than its source is regenerated too.
+    """
+    base = derivative_path(name, size)
+    if source_path:
+        source_mtime = os.path.getmtime(source_path)
+
+    for ext in (".jpg", ".png"):
+        cached = base + ext
+        if os.path.exists(cached) and os.path.getmtime(cached) >= source_mtime:
+            return cached
+
+    image = QImage(source_path) if source_path else QImage.fromData(bytes(data))
+    if image.isNull():
+        print(f"Error decoding image for derivative: {name}")
+        return None
+
+    width, height = size
+    if image.size().scaled(width, height, Qt.KeepAspectRatio) != image.size():
+        image = image.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    # JPEG decodes fastest for opaque images; keep PNG (lightly compressed) where there is alpha
+    if image.hasAlphaChannel():
+        ext, fmt, quality = ".png", "PNG", 90
+    else:
+        ext, fmt, quality = ".jpg", "JPG", 92
+
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    cached = base + ext
+    temp = f"{cached}.{threading.get_ident()}.tmp"  # Per-thread, the viewer and monitor may race
+    if not image.save(temp, fmt, quality):
+        print(f"Error saving image derivative: {cached}")
+        return None
+    os.replace(temp, cached)
+    return cached
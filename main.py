@@ -1,37 +1,57 @@
 #!/usr/bin/env python3
 # main.py
 
-import sys, subprocess, time, pygame
+import sys, os, argparse, subprocess, time
+import metrics
 from threading import Thread
+from PyQt5.QtCore import QCoreApplication, QTimer
 from PyQt5.QtWidgets import QApplication
 from gui import ImageViewer
-from vol_control import VolumeControlWidget
 from media_manager import MediaManager
 from playlist_manager import PlaylistManager
+from playlist_notifier import PlaylistNotifier
+from peer_cache import PeerCache
+from cache_manifest import shared_manifest
+from prefetch import prefetch, display_resolution
 from config import Config
+from screeninfo import get_monitors
 
 class PlaylistMonitor(Thread):
-    def __init__(self, viewer, interval=2):
+    def __init__(self, viewers, interval=2, playlist_manager=None, play_audio=True):
         super().__init__()
-        self.viewer = viewer
+        self.viewers = viewers  # Every viewer showing this playlist (more than one when mirroring)
+        self.viewer = viewers[0]
+        for viewer in viewers:
+            viewer.frame_takers = sum(1 for other in viewers if other.display_size == viewer.display_size)
         self.interval = interval
         self.running = True
-        self.media_manager = MediaManager()
-        self.playlist_manager = PlaylistManager()
-        self.vol_control_widget = VolumeControlWidget(self.media_manager, viewer)
+        self.play_audio = play_audio  # Only one playlist per process drives the speakers
+        self.media_manager = self.viewer.media_manager  # Share the viewer's manager, and with it the mapped bundle
+        self.playlist_manager = playlist_manager or PlaylistManager()
+        self.notifier = PlaylistNotifier(self.playlist_manager)
         
     def run(self):
         """Main thread loop that checks for new playlists"""
-        
+        self.notifier.start()
+
+        while self.running:
+            self.check_playlist()
+
+            # Go round again after the interval, or straight away if a new playlist is announced
+            if self.running:
+                self.notifier.wait_for_change(self.interval)
+
+    def check_playlist(self):
+        """Load the current playlist, switch to the latest one if it changed, and play it"""
         try:
             # Only start the background music once
-            if not hasattr(self, 'background_playing') or not self.background_playing:
+            if self.play_audio and (not hasattr(self, 'background_playing') or not self.background_playing):
                 self.media_manager.play_background_music()  # Start background music
                 self.background_playing = True  # Flag to avoid resetting background music
 
             # Load or fetch playlist
             current_id, media_list = self.playlist_manager.load_playlist_data()
-            latest_id = self.playlist_manager.fetch_latest_playlist_id()
+            latest_id = self.notifier.latest_id
                             
             print("LOOP TEST")
 
@@ -39,68 +59,69 @@ class PlaylistMonitor(Thread):
             if not media_list:
                 print("No playlist available, displaying default image")
                 image_urls = [Config.BACKGROUND_IMAGE]
-                self.viewer.signal.update_images.emit(image_urls)
-                time.sleep(self.interval)  # Sleep and continue checking periodically
+                for viewer in self.viewers:
+                    viewer.signal.update_images.emit(image_urls)
                 return  # Skip the rest of the loop
             
-            if latest_id and latest_id != current_id:
+            if latest_id and str(latest_id) != str(current_id):
                 media_list = self.playlist_manager.fetch_media_list(latest_id)
-                self.playlist_manager.save_playlist_data(latest_id, media_list)
+                media_list = self.playlist_manager.save_playlist_data(latest_id, media_list)
+                current_id = latest_id
+
+            if self.play_audio:
+                self.media_manager.load_bundle(current_id)  # One bundle mapped at a time, the main playlist's
                 
             if media_list:
-                self.play_media_list(media_list)
+                self.play_media_list(media_list, current_id)
                 
         except Exception as e:
             print(f"Error in monitoring: {e}")
             pass
 
-        # Continue checking for new playlists every interval (in seconds)
-        if self.running:
-            time.sleep(self.interval)
-            self.run()  # Recursively call run to keep the thread going
-
-    def play_media_list(self, media_list):
-        """Play through each media set once"""
+    def play_media_list(self, media_list, playlist_id=None):
+        """Play through each media set once, or until a newer playlist than `playlist_id` is announced"""
         for media in media_list:
             try:
-                image_urls = media.get("images", []) 
-                audio_url = media.get("audio", "")
+                image_urls = list(media.images)
+                audio_url = media.audio
                 
                 if not image_urls and not audio_url:
                     print("Skipping media set with missing image or audio")
                     
                 
-                # Download audio file first to ensure it's ready
-                audio_file = self.media_manager.download_audio(audio_url)
-                if not audio_file:
+                # Download (and transcode) audio file first to ensure it's ready, and get its duration
+                audio_duration = self.media_manager.get_audio_duration(audio_url)
+                if audio_duration is None:
                     print(f"Failed to download audio: {audio_url}")
                     continue
                 
-                # Get audio duration
-                sound = pygame.mixer.Sound(audio_file)
-                audio_duration = sound.get_length()
-                
+                # Prepare the first display-sized image off the GUI thread, the viewers decode the rest ahead
+                if image_urls:
+                    for size in {viewer.display_size for viewer in self.viewers}:
+                        self.media_manager.display_image(image_urls[0], size)
+
                 # Display image
                 print(f"Displaying image from set with audio: {audio_url}")
-                self.viewer.signal.update_images.emit(image_urls)
+                for viewer in self.viewers:
+                    viewer.signal.update_slideshow.emit(image_urls, audio_duration)
                 
                 # Wait 1 second before starting audio
                 time.sleep(1)
                 
                 # Play audio
-                print(f"Playing audio: {audio_url}")
-                self.media_manager.play_audio(audio_url)
+                if self.play_audio:
+                    print(f"Playing audio: {audio_url}")
+                    self.media_manager.play_audio(audio_url)
                 
-                # Wait for audio duration plus 3 seconds
+                # Wait for audio duration plus 3 seconds; the media manager fades the background back up itself
                 total_wait = audio_duration + 3
                 time.sleep(total_wait)
-                
-                # Restore background music volume
-                # self.vol_control_widget.update_bg_volume()
-                volume = self.vol_control_widget.bg_slider.value() / 100.0
-                self.media_manager.restore_background_volume(volume)
-                print(f"inside main vol = {volume}")
-                
+
+                # A new playlist was announced, stop here so it can be loaded
+                latest_id = self.notifier.latest_id
+                if latest_id and str(latest_id) != str(playlist_id):
+                    print("New playlist available, leaving current playlist")
+                    break
                 
             except Exception as e:
                 print(f"Error playing media set: {e}")
@@ -109,6 +130,7 @@ class PlaylistMonitor(Thread):
     def stop(self):
         """Stop the monitor thread"""
         self.running = False
+        self.notifier.stop()
 
 def set_hdmi_as_default():
     try:
@@ -152,20 +174,80 @@ def restore_screensaver(window):
     window_id = int(window.winId())  # Get the Window ID
     subprocess.call(["xdg-screensaver", "activate", str(window_id)])
 
+def parse_resolution(value):
+    """argparse type for WIDTHxHEIGHT, e.g. 1920x1080"""
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, e.g. 1920x1080, not {value!r}")
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"width and height must be positive, not {value!r}")
+    return width, height
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Playlist image and audio player")
+    parser.add_argument("--prefetch", action="store_true",
+                        help="fill the cache for the latest playlist without a display or audio device, then exit")
+    parser.add_argument("--resolution", metavar="WIDTHxHEIGHT", type=parse_resolution,
+                        help="display size to prepare images for in --prefetch mode (default: first monitor)")
+    args, _ = parser.parse_known_args()  # Leave Qt's own arguments alone
+    return args
+
+def run_prefetch(args):
+    """Headless cache warm-up, for cron or image builds"""
+    os.environ["SDL_AUDIODRIVER"] = "dummy"  # Mixer without a sound card, for decoding only
+    app = QCoreApplication(sys.argv)  # Lets Qt load its image format plugins
+
+    resolution = args.resolution or display_resolution()
+    if not resolution:
+        print("No display found and no --resolution given, skipping display-sized images")
+
+    peer_cache = None
+    if Config.PEER_CACHE_ENABLED:
+        peer_cache = PeerCache(shared_manifest())
+        peer_cache.start()
+
+    summary = prefetch(MediaManager(peer_cache), PlaylistManager(), resolution)
+    return 1 if summary["failed"] or not summary["playlist_id"] else 0
+
 def main():
+    args = parse_args()
+    if args.prefetch:
+        sys.exit(run_prefetch(args))
+
     # set_hdmi_as_default()
     app = QApplication(sys.argv)
-    media_manager = MediaManager()  # Instantiate MediaManager
-    viewer = ImageViewer(media_manager) 
-    viewer.show()
+    peer_cache = None
+    if Config.PEER_CACHE_ENABLED:
+        peer_cache = PeerCache(shared_manifest())
+        peer_cache.start()
 
-    suspend_screensaver(viewer)
+    media_manager = MediaManager(peer_cache)  # Instantiate MediaManager
 
-    monitor = PlaylistMonitor(viewer)
+    # One viewer per monitor in multi-display modes, all sharing the media manager and slide decodes
+    screens = get_monitors() if Config.DISPLAY_MODE in ("mirror", "extend") else get_monitors()[:1]
+    viewers = []
+    for screen in screens:
+        viewer = ImageViewer(media_manager, screen)
+        viewer.show()
+        suspend_screensaver(viewer)
+        viewers.append(viewer)
+
+    if Config.DISPLAY_MODE == "extend":
+        # The first screen keeps the default playlist and plays the audio, the others follow their own
+        unassigned = viewers[1 + len(Config.SCREEN_IDS):]
+        if unassigned:
+            print(f"No screen ID for {len(unassigned)} monitor(s) in extend mode, mirroring the main playlist on them")
+        monitors = [PlaylistMonitor(viewers[:1] + unassigned)]
+        for viewer, screen_id in zip(viewers[1:], Config.SCREEN_IDS):
+            monitors.append(PlaylistMonitor([viewer], playlist_manager=PlaylistManager(screen_id), play_audio=False))
+    else:
+        monitors = [PlaylistMonitor(viewers)]
     
     def run_playlist_loop():
-        monitor.daemon = True
-        monitor.start()
+        for monitor in monitors:
+            monitor.daemon = True
+            monitor.start()
         # monitor.join()  # Wait for the playlist to finish
         
         # Monitor is now running indefinitely, so the main thread can be used for other things
@@ -176,6 +258,14 @@ def main():
     playlist_thread.start()
   
     app.aboutToQuit.connect(lambda: setattr(playlist_thread, "running", False))
+    app.aboutToQuit.connect(shared_manifest().flush)  # Write any changes still waiting on the save delay
+
+    # Log the latency and frame timings now and then, and once more on the way out
+    app.aboutToQuit.connect(metrics.report)
+    if Config.METRICS_REPORT_INTERVAL:
+        metrics_timer = QTimer()
+        metrics_timer.timeout.connect(metrics.report)
+        metrics_timer.start(int(Config.METRICS_REPORT_INTERVAL * 1000))
 
     
     sys.exit(app.exec_())
@@ -1,12 +1,50 @@
 # media_manager.py
-import requests, os, pygame
+import requests, hashlib, os, struct, time, pygame
+import metrics, audio_info
 from config import Config
+from cache_manifest import shared_manifest
+from audio_transcode import transcode_for_mixer
+from audio_stream import ChannelStream, matches_mixer
+from asset_bundle import AssetBundle, fetch_bundle
+from image_derivatives import make_display_derivative
+from single_flight import SingleFlight
+from audio_ducker import BackgroundDucker
+
+# Shared by every MediaManager so the viewer and the monitor thread never fetch or derive the same asset twice
+_downloads = SingleFlight()
+_derivatives = SingleFlight()
+# Reported by metrics.report() with the download_hits counter
+metrics.gauge("download_transfers", lambda: _downloads.calls)
+metrics.gauge("download_coalesced", lambda: _downloads.coalesced)
+
+def record_start_latency(started, output_latency):
+    """Report time from the play request to the clip reaching the speakers"""
+    latency = time.perf_counter() - started
+    metrics.record("audio_start_latency", latency)
+    metrics.record("audio_start_to_sound", latency + output_latency)
+    print(f"Audio start latency: {latency * 1000:.1f} ms (+{output_latency * 1000:.1f} ms output buffer)")
 
 class MediaManager:
-    def __init__(self):
-        pygame.mixer.init()
+    def __init__(self, peer_cache=None):
+        pygame.mixer.init(frequency=Config.MIXER_FREQUENCY, size=Config.MIXER_SIZE,
+                          channels=Config.MIXER_CHANNELS, buffer=Config.MIXER_BUFFER)
+        frequency = pygame.mixer.get_init()[0]
+        self.output_latency = Config.MIXER_BUFFER / float(frequency)  # Time a sample waits in the device buffer
+        metrics.record("mixer_buffer_latency", self.output_latency)
         self.background_channel = pygame.mixer.Channel(0)
         self.media_channel = pygame.mixer.Channel(1)
+        self.ducker = BackgroundDucker(self)
+        self.ducker.start()
+        self.manifest = shared_manifest()
+        self.peer_cache = peer_cache  # Other screens on the LAN to try before the origin
+        self.bundle = None  # Packed assets of the current playlist, when bundles are enabled
+        self.bundle_playlist_id = None
+        self.display_size = None  # Default (width, height) images are prepared for, set by the first viewer
+        self.background_stream = None  # ChannelStream feeding the background channel, if streaming
+        self.media_stream = None
+        self.media_uses_music = False  # A long compressed clip has the music player
+        self.media_source = None
+        self.media_volume = 1.0
         # self.vol_control_widget = VolumeControlWidget(self.media_manager, viewer)
         
     def download_file(self, url, directory):
@@ -16,53 +54,308 @@ class MediaManager:
             if os.path.exists(url):
                 return url
 
-            filename = os.path.join(directory, url.split("/")[-1])
+            name = url.split("/")[-1]
+            filename = os.path.join(directory, name)
             if os.path.exists(filename):
+                metrics.increment("download_hits")
+                if not self.manifest.get(name):
+                    self.manifest.add(name, url, filename)  # Cached before the manifest existed
                 return filename
-                
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            with open(filename, "wb") as f:
-                f.write(response.content)
+
+            # Concurrent requests for the same file wait for the first one's transfer
+            return _downloads.do(filename, lambda: self._fetch_file(url, name, filename))
+        except Exception as e:
+            print(f"Error downloading file from {url}: {e}")
+            return None
+
+    def _fetch_file(self, url, name, filename):
+        if os.path.exists(filename):
+            return filename  # Finished by another caller just before this one got the slot
+
+        try:
+            # A copy we had before (since deleted) tells us which content to accept from peers
+            entry = self.manifest.get(name)
+            expected = entry["sha256"] if entry and entry["url"] == url else None
+            fetched = self.peer_cache.fetch(name, expected) if self.peer_cache else None
+            if fetched:
+                content, sha256 = fetched
+            else:
+                response = requests.get(url)
+                response.raise_for_status()
+                content = response.content
+                sha256 = hashlib.sha256(content).hexdigest()
             
+            # Write under a temporary name so a half-written file is never mistaken for a cached one
+            temp = filename + ".part"
+            with open(temp, "wb") as f:
+                f.write(content)
+            os.replace(temp, filename)
+
+            self.manifest.add(name, url, filename, sha256)
             return filename
         except Exception as e:
             print(f"Error downloading file from {url}: {e}")
             return None
+
+    def download_stats(self):
+        """Cache hits, transfers and requests that shared another request's transfer"""
+        return {
+            "hits": metrics.counts().get("download_hits", 0),
+            "transfers": _downloads.calls,
+            "coalesced": _downloads.coalesced,
+        }
             
+    def load_bundle(self, playlist_id):
+        """Fetch (or resume) and map the packed bundle for a playlist"""
+        if not Config.USE_ASSET_BUNDLES or not playlist_id:
+            return None
+        if str(playlist_id) == str(self.bundle_playlist_id):
+            return self.bundle
+
+        try:
+            path = os.path.join(Config.BUNDLES_DIR, f"{playlist_id}.bundle")
+            if not os.path.exists(path):
+                fetch_bundle(f"{Config.API_GET_PLAYLIST_BUNDLE}{playlist_id}", path)
+            bundle = AssetBundle(path)
+        except (ValueError, struct.error) as e:
+            # Truncated or corrupt; remove it so the next cycle fetches it again
+            print(f"Discarding bad bundle for playlist {playlist_id}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        except Exception as e:
+            print(f"Error loading bundle for playlist {playlist_id}: {e}")
+            return None
+
+        previous, self.bundle = self.bundle, bundle
+        self.bundle_playlist_id = playlist_id
+        if previous:
+            previous.close()
+
+        # Bundles of older playlists are no longer needed
+        for name in os.listdir(Config.BUNDLES_DIR):
+            if name.endswith(".bundle") and os.path.join(Config.BUNDLES_DIR, name) != path:
+                try:
+                    os.remove(os.path.join(Config.BUNDLES_DIR, name))
+                except OSError:
+                    pass
+        return bundle
+
+    def get_bundled_asset(self, url):
+        """Return an asset's bytes straight from the mapped bundle, or None if it isn't bundled"""
+        bundle = self.bundle
+        if bundle is None:
+            return None
+        return bundle.get(url.split("/")[-1])
+
+    def _audio_source(self, url):
+        """A clip's bytes as (source, name): a reader over the bundle if it's bundled, else its cached file"""
+        name = url.split("/")[-1]
+        bundle = self.bundle
+        reader = bundle.open(name) if bundle else None
+        if reader:
+            return reader, name
+        return self.download_audio(url), name
+
+    def prepare_audio(self, url):
+        """Transcode a short clip to the mixer format if enabled; returns (path, duration) or (None, None)"""
+        if not Config.TRANSCODE_AUDIO:
+            return None, None
+
+        try:
+            bundle = self.bundle
+            source, name = self._audio_source(url)
+            if not source:
+                return None, None
+            if self.should_stream(source, audio_info.duration(source, name)):
+                return None, None  # Long tracks are streamed as they are rather than decoded whole
+
+            mtime = 0 if isinstance(source, str) else os.path.getmtime(bundle.path)
+            return _derivatives.do(("pcm", name), lambda: transcode_for_mixer(name, source, mtime))
+        except Exception as e:
+            print(f"Error transcoding audio {url}: {e}")
+            return None, None
+
+    def get_audio_duration(self, url):
+        """Length of a clip in seconds, read from its header rather than by decoding it"""
+        _, duration = self.prepare_audio(url)
+        if duration is not None:
+            return duration
+
+        source, name = self._audio_source(url)
+        if not source:
+            return None
+        duration = audio_info.duration(source, name)
+        if duration is not None:
+            return duration
+
+        # A format without a header we can read; only small clips are worth decoding to measure
+        if self.should_stream(source):
+            print(f"Can't read the length of {name} without decoding it")
+            return None
+        sound = self.load_sound(url)
+        return sound.get_length() if sound else None
+
+    def should_stream(self, source, duration=None):
+        """Whether a track is long enough that it should be streamed rather than decoded into RAM"""
+        if duration is not None and duration >= Config.STREAM_MIN_DURATION:
+            return True
+        if isinstance(source, str):
+            size = os.path.getsize(source)
+        else:
+            size = source.seek(0, os.SEEK_END)
+            source.seek(0)
+        return size >= Config.STREAM_MIN_BYTES
+
+    def load_sound(self, url):
+        """Load a clip from the bundle if it's there, otherwise from the download cache"""
+        path, _ = self.prepare_audio(url)
+        if path:
+            return pygame.mixer.Sound(path)
+
+        source, _ = self._audio_source(url)
+        if not source:
+            return None
+        return pygame.mixer.Sound(source) if isinstance(source, str) else pygame.mixer.Sound(file=source)
+
     def download_audio(self, url):
         return self.download_file(url, Config.AUDIO_DIR)
         
     def download_image(self, url):
         return self.download_file(url, Config.IMAGES_DIR)
         
-    def play_audio(self, audio_url, background_volume=0.2):
+    def display_image(self, url, size=None):
+        """Return the path of a display-sized copy of an image, generating it on first use.
+
+        `size` is the (width, height) of the screen it's for; copies are kept per resolution.
+        """
+        size = size or self.display_size
+        try:
+            name = url.split("/")[-1]
+            data = self.get_bundled_asset(url)
+            if data is not None:
+                if not size:
+                    return None
+                mtime = os.path.getmtime(self.bundle.path)
+                return _derivatives.do((name, size),
+                                       lambda: make_display_derivative(name, size, data=data, source_mtime=mtime))
+
+            source = self.download_image(url)
+            if not source or not size:
+                return source
+            return _derivatives.do((name, size),
+                                   lambda: make_display_derivative(name, size, source_path=source)) or source
+        except Exception as e:
+            print(f"Error preparing display image for {url}: {e}")
+            return None
+
+    def play_audio(self, audio_url, background_volume=None):
         try:
-            filename = self.download_audio(audio_url)
-            if not filename:
-                return 0
-                
-            sound = pygame.mixer.Sound(filename)
+            start = time.perf_counter()
+            self.stop_media()
+
+            source, length = self.prepare_audio(audio_url)
+            name = audio_url.split("/")[-1]
+            if not source:
+                source, name = self._audio_source(audio_url)
+                if not source:
+                    return 0
+                length = audio_info.duration(source, name)
+
+            sound = None
+            if not self.should_stream(source, length):
+                sound = pygame.mixer.Sound(source) if isinstance(source, str) else pygame.mixer.Sound(file=source)
+                length = sound.get_length()
             
-            # Lower background music volume
-            self.background_channel.set_volume(background_volume)
+            # Fade background music down; it comes back up once the mixer reports the clip finished
+            self.ducker.duck(background_volume)
             
-            # Play media audio
-            self.media_channel.play(sound)
+            # Play media audio; long tracks are streamed so only a small buffer is ever decoded
+            if sound:
+                self.media_channel.play(sound)
+                record_start_latency(start, self.output_latency)
+            elif isinstance(source, str) and matches_mixer(source):
+                self.media_stream = ChannelStream(self.media_channel, source,
+                                                  on_start=lambda: record_start_latency(start, self.output_latency))
+                self.media_stream.start()
+            else:
+                self.play_media_music(source, name)
+                record_start_latency(start, self.output_latency)
             
-            return sound.get_length()
+            return length or 0
         except Exception as e:
             print(f"Error playing audio: {e}")
             return 0
-            
+
+    def play_media_music(self, source, name):
+        """Stream a long compressed clip through pygame.mixer.music, the only player that decodes incrementally"""
+        self.media_source = source  # The player reads from it for as long as the clip plays
+        if isinstance(source, str):
+            pygame.mixer.music.load(source)
+        else:
+            pygame.mixer.music.load(source, name)
+        pygame.mixer.music.set_volume(self.media_volume)
+        pygame.mixer.music.play()
+        self.media_uses_music = True
+
+    def media_busy(self):
+        """Whether media audio is still playing, on its channel or on the music player"""
+        if self.media_channel.get_busy():
+            return True
+        return self.media_uses_music and pygame.mixer.music.get_busy()
+
+    def media_finished(self):
+        """Release the music player once a streamed media clip is over"""
+        self.media_uses_music = False
+        self.media_source = None
+
+    def stop_media(self):
+        """Stop whatever media audio is playing"""
+        if self.media_stream:
+            self.media_stream.stop()
+            self.media_stream = None
+        self.media_channel.stop()
+        if self.media_uses_music:
+            pygame.mixer.music.stop()
+            self.media_finished()
+
     def play_background_music(self):
         if os.path.exists(Config.BACKGROUND_MUSIC):
-            background_sound = pygame.mixer.Sound(Config.BACKGROUND_MUSIC)
-            self.background_channel.play(background_sound, loops=-1)
+            path = Config.BACKGROUND_MUSIC
+            if self.should_stream(path, audio_info.duration(path)):
+                # Stream it on its own channel, so ducking works and the music player stays free for media.
+                # A compressed track is decoded once into a mixer-format copy that can be streamed
+                if not matches_mixer(path):
+                    name = os.path.basename(path)
+                    path, _ = _derivatives.do(("pcm", name), lambda: transcode_for_mixer(name, Config.BACKGROUND_MUSIC))
+                if path:
+                    self.background_stream = ChannelStream(self.background_channel, path, loops=-1)
+                    self.background_stream.start()
+                else:
+                    print("Background music can't be converted for streaming, decoding it whole")
+            if not self.background_stream:
+                background_sound = pygame.mixer.Sound(Config.BACKGROUND_MUSIC)
+                self.background_channel.play(background_sound, loops=-1)
             # volume = self.vol_control_widget.bg_slider.value() / 100.0
-            self.background_channel.set_volume(1.0)
+            self.set_background_volume(self.ducker.level)
+
+    def set_background_level(self, v):
+        """Set the user's background music level (the volume slider)"""
+        self.ducker.set_level(v)
+
+    def set_background_volume(self, v):
+        """Set background music volume"""
+        self.background_channel.set_volume(v)
+
+    def set_media_volume(self, v):
+        """Set media audio volume (the volume slider), whichever player the clip is on"""
+        self.media_volume = v
+        self.media_channel.set_volume(v)
+        if self.media_uses_music:
+            pygame.mixer.music.set_volume(v)
             
     def restore_background_volume(self,v):
-        self.background_channel.set_volume(v)
+        self.ducker.restore(v)
         print(f"Restored to {v}")
\ No newline at end of file
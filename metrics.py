@@ -0,0 +1,57 @@
+# metrics.py
+
+import threading
+from collections import deque
+
+_lock = threading.Lock()
+_samples = {}
+_counters = {}
+_gauges = {}
+
+def record(name, value, keep=500):
+    """Record one measurement (seconds, bytes, ...) under `name`, keeping the most recent `keep`"""
+    with _lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=keep)
+        samples.append(value)
+
+def increment(name, amount=1):
+    """Add to a running count under `name`"""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def gauge(name, read):
+    """Report the value of `read()` under `name` whenever counts are taken"""
+    with _lock:
+        _gauges[name] = read
+
+def counts():
+    """Return {name: value} for every counter and gauge"""
+    with _lock:
+        values = dict(_counters)
+        gauges = dict(_gauges)
+    values.update((name, read()) for name, read in gauges.items())
+    return values
+
+def summary():
+    """Return {name: {"count", "last", "avg", "max"}} over the recent samples"""
+    with _lock:
+        snapshot = {name: list(samples) for name, samples in _samples.items()}
+
+    return {
+        name: {
+            "count": len(values),
+            "last": values[-1],
+            "avg": sum(values) / len(values),
+            "max": max(values),
+        }
+        for name, values in snapshot.items() if values
+    }
+
+def report():
+    """Print a one-line summary per metric, then the counts"""
+    for name, stats in sorted(summary().items()):
+        print(f"{name}: last={stats['last']:.4f} avg={stats['avg']:.4f} max={stats['max']:.4f} (n={stats['count']})")
+    for name, value in sorted(counts().items()):
+        print(f"{name}: {value}")
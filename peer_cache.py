@@ -0,0 +1,254 @@
+# peer_cache.py
+
+import hashlib, json, os, random, shutil, socket, struct, time, uuid, requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from threading import Thread, Event, Lock
+from config import Config
+
+class PeerCache:
+    """Shares cached assets with other screens on the LAN.
+
+    Each device serves its cache over HTTP and announces itself on a multicast group.
+    Peers' manifests (file name -> sha256) are re-read, changes only, when their version moves, and
+    assets are fetched by content hash and verified before use. When no peer has an
+    asset yet, screens missing it at the same moment claim it over multicast so only
+    one of them downloads it from the origin and the rest fetch it from that screen.
+    """
+
+    def __init__(self, manifest, group=None, port=None):
+        self.manifest = manifest
+        self.group = group or Config.PEER_GROUP
+        self.port = port or Config.PEER_PORT
+        self.node_id = uuid.uuid4().hex
+        self.peers = {}  # node_id -> {"host", "port", "version", "seen", "manifest", "manifest_version"}
+        self.claims = {}  # file name -> {node_id: when its claim arrived}
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self._stop_event = Event()
+        self._server = None
+
+    def start(self):
+        """Start serving, announcing and listening"""
+        self._server = ThreadingHTTPServer(("", Config.PEER_HTTP_PORT), self._handler())
+        self._server.daemon_threads = True
+        self.http_port = self._server.server_address[1]
+        self._sock = self._multicast_socket()
+
+        for target in (self._server.serve_forever, self._announce, self._listen):
+            Thread(target=target, daemon=True).start()
+        print(f"Peer cache serving on port {self.http_port}")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._server:
+            self._server.shutdown()
+
+    def fetch(self, name, expected_sha256=None):
+        """Fetch an asset from a peer; returns (content, sha256) or None to get it from the origin.
+
+        `expected_sha256`, when known, rejects peer copies of other content under the same name.
+        """
+        peers = self._live_peers()
+        for peer in peers:
+            fetched = self._fetch_from(peer, name, expected_sha256)
+            if fetched:
+                return fetched
+
+        # Nobody has it; if another screen is already downloading it, wait for that copy
+        owner = self._claim(name) if peers else None  # Alone on the network, nobody to agree with
+        if owner is not None:
+            fetched = self._wait_for(owner, name, expected_sha256)
+            if fetched:
+                return fetched
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def _fetch_from(self, peer, name, expected_sha256=None, refresh=False):
+        entry = self._peer_manifest(peer, refresh).get(name)
+        if not entry:
+            return None
+        sha256 = entry["sha256"]
+        if expected_sha256 and sha256 != expected_sha256:
+            return None
+
+        try:
+            response = requests.get(f"http://{peer['host']}:{peer['port']}/asset/{sha256}",
+                                    timeout=(2, Config.PEER_FETCH_TIMEOUT))
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Error fetching {name} from peer {peer['host']}: {e}")
+            return None
+
+        # Never trust a peer's copy without checking it against the hash
+        if hashlib.sha256(response.content).hexdigest() != sha256:
+            print(f"Peer {peer['host']} sent a corrupt copy of {name}, ignoring it")
+            return None
+
+        with self.lock:
+            self.hits += 1
+        print(f"Fetched {name} from peer {peer['host']}")
+        return response.content, sha256
+
+    def _claim(self, name):
+        """Agree with other screens on who downloads `name`; returns the owning peer, or None if it's us"""
+        now = time.monotonic()
+        with self.lock:
+            claims = self.claims.get(name, {})
+            earlier = [node for node, claimed in claims.items()
+                       if now - claimed < Config.PEER_CLAIM_WAIT and node in self.peers]
+            if earlier:
+                return self.peers[min(earlier, key=claims.get)]
+
+        self._send({"claim": name})
+
+        # Claims sent at the same moment as ours all arrive within the jitter; the lowest node ID wins
+        self._stop_event.wait(random.uniform(0.5, 1.0) * Config.PEER_CLAIM_JITTER)
+        with self.lock:
+            rivals = [node for node, claimed in self.claims.get(name, {}).items()
+                      if claimed >= now and node in self.peers]
+            owner = min(rivals + [self.node_id])
+            return None if owner == self.node_id else self.peers[owner]
+
+    def _wait_for(self, peer, name, expected_sha256=None):
+        """Poll the claiming peer until its copy shows up, backing off between tries"""
+        print(f"Waiting for peer {peer['host']} to download {name}")
+        delay = 0.25
+        deadline = time.monotonic() + Config.PEER_CLAIM_WAIT
+        while time.monotonic() < deadline and not self._stop_event.is_set():
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, 2)
+            if peer not in self._live_peers():
+                break
+            # Its announcement of the new copy may not have arrived yet, so ask for changes now
+            fetched = self._fetch_from(peer, name, expected_sha256, refresh=True)
+            if fetched:
+                return fetched
+        return None
+
+    def _live_peers(self):
+        cutoff = time.monotonic() - Config.PEER_ANNOUNCE_INTERVAL * 3
+        with self.lock:
+            return [peer for peer in self.peers.values() if peer["seen"] >= cutoff]
+
+    def _peer_manifest(self, peer, refresh=False):
+        if peer["manifest_version"] == peer["version"] and not refresh:
+            return peer["manifest"]
+        try:
+            # Only the entries changed since the copy we have, unless the peer restarted since
+            params = {}
+            if peer["manifest_version"] is not None:
+                params = {"since": peer["manifest_version"], "epoch": peer.get("manifest_epoch")}
+            response = requests.get(f"http://{peer['host']}:{peer['port']}/manifest", params=params, timeout=2)
+            response.raise_for_status()
+            changes = response.json()
+
+            manifest = peer["manifest"] if not changes["full"] else {}
+            for name, entry in changes["entries"].items():
+                if entry is None:
+                    manifest.pop(name, None)
+                else:
+                    manifest[name] = entry
+            peer["manifest"] = manifest
+            peer["manifest_version"] = changes["version"]
+            peer["manifest_epoch"] = changes["epoch"]
+        except Exception as e:
+            print(f"Error reading manifest of peer {peer['host']}: {e}")
+        return peer["manifest"]
+
+    def _multicast_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)  # Several processes per machine
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)  # Stay on the local network
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        return sock
+
+    def _send(self, extra=None):
+        message = {"node": self.node_id, "port": self.http_port, "version": self.manifest.version}
+        message.update(extra or {})
+        try:
+            self._sock.sendto(json.dumps(message).encode("utf-8"), (self.group, self.port))
+        except OSError as e:
+            print(f"Error announcing peer cache: {e}")
+
+    def _announce(self):
+        while not self._stop_event.is_set():
+            self._send()
+            self._stop_event.wait(Config.PEER_ANNOUNCE_INTERVAL)
+
+    def _listen(self):
+        sock = self._multicast_socket()
+        sock.bind(("", self.port))
+        membership = struct.pack("4s4s", socket.inet_aton(self.group), socket.inet_aton("0.0.0.0"))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        sock.settimeout(1)
+
+        while not self._stop_event.is_set():
+            try:
+                data, (host, _) = sock.recvfrom(4096)
+                message = json.loads(data.decode("utf-8"))
+            except socket.timeout:
+                continue
+            except (OSError, ValueError):
+                continue
+
+            node = message.get("node")
+            if not node or node == self.node_id:
+                continue
+
+            now = time.monotonic()
+            with self.lock:
+                peer = self.peers.setdefault(node, {"manifest": {}, "manifest_version": None})
+                peer.update(host=host, port=message.get("port"), version=message.get("version"), seen=now)
+                if message.get("claim"):
+                    self.claims.setdefault(message["claim"], {})[node] = now
+                    self._prune_claims(now)
+
+    def _prune_claims(self, now):
+        for name in list(self.claims):
+            claims = self.claims[name]
+            for node in [node for node, claimed in claims.items() if now - claimed >= Config.PEER_CLAIM_WAIT]:
+                del claims[node]
+            if not claims:
+                del self.claims[name]
+
+    def _handler(self):
+        manifest = self.manifest
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                if url.path == "/manifest":
+                    query = parse_qs(url.query)
+                    since = int(query["since"][0]) if query.get("since", [""])[0].isdigit() else None
+                    epoch = query.get("epoch", [None])[0]
+                    body = json.dumps(manifest.snapshot(since, epoch)).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                if self.path.startswith("/asset/"):
+                    path = manifest.path_for_hash(self.path[len("/asset/"):])
+                    if path:
+                        with open(path, "rb") as f:
+                            self.send_response(200)
+                            self.send_header("Content-Type", "application/octet-stream")
+                            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+                            self.end_headers()
+                            shutil.copyfileobj(f, self.wfile)
+                        return
+
+                self.send_error(404)
+
+            def log_message(self, format, *args):
+                pass  # Keep peer traffic out of the console
+
+        return Handler
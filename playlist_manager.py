@@ -1,15 +1,35 @@
 # playlist_manager.py
 
 from config import Config
+from playlist_model import Playlist, write_playlist
 import os, requests, json
 
 class PlaylistManager:
-    def __init__(self):
+    def __init__(self, screen_id=None):
         self.current_playlist_id = None
+        self._loaded = None  # (header stat, playlist_id, Playlist) of the last load
+
+        # Extra screens of a multi-display install keep their own playlist and files
+        self.latest_playlist_url = Config.API_GET_LATEST_PLAYLIST
+        self.playlist_events_url = Config.API_PLAYLIST_EVENTS
+        self.playlist_data = Config.PLAYLIST_DATA
+        self.playlist_sets = Config.PLAYLIST_SETS
+        self.playlist_index = Config.PLAYLIST_INDEX
+        if screen_id is not None:
+            self.latest_playlist_url = f"{Config.API_GET_LATEST_PLAYLIST_FOR_SCREEN}{screen_id}"
+            self.playlist_events_url = f"{Config.API_PLAYLIST_EVENTS_FOR_SCREEN}{screen_id}"
+            self.playlist_data = self._screen_path(Config.PLAYLIST_DATA, screen_id)
+            self.playlist_sets = self._screen_path(Config.PLAYLIST_SETS, screen_id)
+            self.playlist_index = self._screen_path(Config.PLAYLIST_INDEX, screen_id)
+
+    @staticmethod
+    def _screen_path(path, screen_id):
+        base, ext = os.path.splitext(path)
+        return f"{base}_{screen_id}{ext}"
         
     def fetch_latest_playlist_id(self):
         try:
-            response = requests.get(Config.API_GET_LATEST_PLAYLIST)
+            response = requests.get(self.latest_playlist_url)
             response.raise_for_status()
             data = response.json()
             return data.get("data", {}).get("id")
@@ -30,17 +50,27 @@ class PlaylistManager:
             return []
             
     def save_playlist_data(self, playlist_id, media_list):
+        """Store a playlist as a lazily-read set file plus a small header; returns the Playlist"""
+        playlist = write_playlist(playlist_id, media_list, self.playlist_sets, self.playlist_index)
+
         data = {
             "playlist_id": playlist_id,
-            "media_list": media_list
+            "count": len(playlist)
         }
         
-        with open(Config.PLAYLIST_DATA, "w") as f:
+        with open(self.playlist_data, "w") as f:
             json.dump(data, f)
+
+        self._loaded = (self._header_stat(), playlist_id, playlist)
+        return playlist
+
+    def _header_stat(self):
+        stat = os.stat(self.playlist_data)
+        return stat.st_mtime_ns, stat.st_size
             
     def load_playlist_data(self):
 
-        if not os.path.exists(Config.PLAYLIST_DATA):  # Check if the file doesn't exist
+        if not os.path.exists(self.playlist_data):  # Check if the file doesn't exist
             print("No playlist data file found, fetching playlist from server.")
             latest_id = self.fetch_latest_playlist_id()
             if latest_id:
@@ -48,14 +78,27 @@ class PlaylistManager:
                 media_list = self.fetch_media_list(latest_id)
                 if media_list:
                     # Save the fetched playlist data to a file
-                    self.save_playlist_data(latest_id, media_list)
-                    return latest_id, media_list
+                    playlist = self.save_playlist_data(latest_id, media_list)
+                    return latest_id, playlist
             return None, None  # Return None if fetching fails
 
         try:
-            with open(Config.PLAYLIST_DATA, "r") as f:
+            # An unchanged playlist is returned as is, without touching the set file
+            header_stat = self._header_stat()
+            if self._loaded and self._loaded[0] == header_stat:
+                return self._loaded[1], self._loaded[2]
+
+            with open(self.playlist_data, "r") as f:
                 data = json.load(f)
-                return data["playlist_id"], data["media_list"]
+
+            if "media_list" in data:
+                # Written by an older version, convert it once
+                playlist = self.save_playlist_data(data["playlist_id"], data["media_list"])
+                return data["playlist_id"], playlist
+
+            playlist = Playlist(data["playlist_id"], self.playlist_sets, self.playlist_index)
+            self._loaded = (header_stat, data["playlist_id"], playlist)
+            return data["playlist_id"], playlist
         except Exception as e:
             print(f"Error loading playlist data: {e}")
             return None, None
\ No newline at end of file
@@ -0,0 +1,74 @@
+# playlist_model.py
+
+import json, os, struct, sys
+
+OFFSET = struct.Struct("<Q")
+
+class MediaSet:
+    """One media set: its images, its audio clip and any other per-set fields"""
+    __slots__ = ("images", "audio", "meta")
+
+    def __init__(self, images=(), audio="", meta=None):
+        # URLs repeat across sets, interning keeps one copy of each
+        self.images = tuple(sys.intern(url) for url in images)
+        self.audio = sys.intern(audio) if audio else ""
+        self.meta = meta or None
+
+    @classmethod
+    def from_dict(cls, data):
+        meta = {key: value for key, value in data.items() if key not in ("images", "audio")}
+        return cls(data.get("images") or (), data.get("audio") or "", meta)
+
+    def to_dict(self):
+        data = dict(self.meta or {})
+        data["images"] = list(self.images)
+        data["audio"] = self.audio
+        return data
+
+class Playlist:
+    """Media sets kept on disk, one JSON line each, read only as they are reached.
+
+    A side index of byte offsets gives the length and random access without holding
+    any set in memory, so memory follows how far ahead the player looks, not the
+    playlist size.
+    """
+
+    def __init__(self, playlist_id, sets_path, index_path):
+        self.playlist_id = playlist_id
+        self.sets_path = sets_path
+        self.index_path = index_path
+        self._length = os.path.getsize(index_path) // OFFSET.size
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        with open(self.sets_path, "rb") as f:
+            for line in f:
+                yield MediaSet.from_dict(json.loads(line))
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError("media set index out of range")
+
+        with open(self.index_path, "rb") as index:
+            index.seek(position * OFFSET.size)
+            offset, = OFFSET.unpack(index.read(OFFSET.size))
+        with open(self.sets_path, "rb") as f:
+            f.seek(offset)
+            return MediaSet.from_dict(json.loads(f.readline()))
+
+def write_playlist(playlist_id, media_list, sets_path, index_path):
+    """Write media sets (dicts or MediaSets) and their offset index; returns the Playlist"""
+    sets_temp, index_temp = sets_path + ".tmp", index_path + ".tmp"
+    with open(sets_temp, "wb") as sets, open(index_temp, "wb") as index:
+        for media in media_list:
+            data = media.to_dict() if isinstance(media, MediaSet) else media
+            index.write(OFFSET.pack(sets.tell()))
+            sets.write(json.dumps(data, separators=(",", ":")).encode("utf-8") + b"\n")
+
+    os.replace(sets_temp, sets_path)
+    os.replace(index_temp, index_path)
+    return Playlist(playlist_id, sets_path, index_path)
@@ -0,0 +1,133 @@
+# playlist_notifier.py
+
+import json, random, time, requests
+from threading import Thread, Event, Lock
+from config import Config
+
+class PlaylistNotifier(Thread):
+    """Tracks the latest playlist ID, pushed over an event stream with polling as fallback"""
+
+    def __init__(self, playlist_manager, events_url=None):
+        super().__init__(daemon=True)
+        self.playlist_manager = playlist_manager
+        self.events_url = events_url or playlist_manager.playlist_events_url
+        self.latest_id = None
+        self.changed = Event()  # Set whenever latest_id changes after the first fetch
+        self.running = True
+        self.push_connected = False
+        self._stop_event = Event()
+        self._lock = Lock()
+        self._response = None
+
+    def run(self):
+        # Get a starting point before waiting on the stream
+        self._set_latest_id(self.playlist_manager.fetch_latest_playlist_id())
+
+        while self.running:
+            try:
+                self.listen()
+            except Exception as e:
+                print(f"Playlist event stream unavailable: {e}")
+            finally:
+                self.push_connected = False
+
+            if self.running:
+                self.poll(Config.PUSH_RETRY_INTERVAL)
+
+    def listen(self):
+        """Follow the server-sent event stream until it drops"""
+        response = requests.get(
+            self.events_url,
+            stream=True,
+            headers={"Accept": "text/event-stream"},
+            timeout=(Config.PUSH_CONNECT_TIMEOUT, Config.PUSH_READ_TIMEOUT),
+        )
+        response.raise_for_status()
+        self._response = response
+        self.push_connected = True
+        print("Listening for playlist changes")
+
+        # Re-sync in case a change happened while we were disconnected
+        self._set_latest_id(self.playlist_manager.fetch_latest_playlist_id())
+
+        data_lines = []
+        try:
+            # One byte at a time, so each event is handled as soon as it arrives instead of
+            # sitting in a read buffer until more data follows
+            for line in response.iter_lines(chunk_size=1, decode_unicode=True):
+                if not self.running:
+                    break
+                if line is None:
+                    continue
+                if line == "":
+                    # A blank line dispatches the event
+                    if data_lines:
+                        self._set_latest_id(self.parse_event("\n".join(data_lines)))
+                        data_lines = []
+                elif line.startswith("data:"):
+                    data_lines.append(line[5:].lstrip())
+                # Comments (keep-alives), "event:", "id:" and "retry:" fields are ignored
+        finally:
+            self._response = None
+            response.close()
+
+    def poll(self, duration):
+        """Poll with an adaptive, jittered interval for `duration` seconds"""
+        interval = Config.POLL_MIN_INTERVAL
+        deadline = time.monotonic() + duration
+
+        while self.running and time.monotonic() < deadline:
+            jitter = 1 + random.uniform(-Config.POLL_JITTER, Config.POLL_JITTER)
+            if self._stop_event.wait(interval * jitter):
+                return
+
+            if self._set_latest_id(self.playlist_manager.fetch_latest_playlist_id()):
+                interval = Config.POLL_MIN_INTERVAL  # Changes tend to come in bursts
+            else:
+                interval = min(interval * 2, Config.POLL_MAX_INTERVAL)
+
+    @staticmethod
+    def parse_event(data):
+        """Extract a playlist ID from an event payload (`5`, `"5"` or `{"id": 5}`)"""
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            payload = data.strip()
+
+        if isinstance(payload, dict):
+            payload = payload.get("data", payload)
+            if isinstance(payload, dict):
+                payload = payload.get("id", payload.get("playlist_id"))
+        return payload or None
+
+    def _set_latest_id(self, playlist_id):
+        if playlist_id is None:
+            return False
+
+        with self._lock:
+            if str(playlist_id) == str(self.latest_id):
+                return False
+            previous, self.latest_id = self.latest_id, playlist_id
+
+        # The first ID learned is a starting point, not a change
+        if previous is None:
+            return False
+
+        print(f"Playlist changed: {previous} -> {playlist_id}")
+        self.changed.set()
+        return True
+
+    def wait_for_change(self, timeout):
+        """Block until the playlist changes or `timeout` passes; returns True on change"""
+        changed = self.changed.wait(timeout)
+        self.changed.clear()
+        return changed
+
+    def stop(self):
+        """Stop the notifier thread"""
+        self.running = False
+        self._stop_event.set()
+        response = self._response
+        if response is not None:
+            # Closing waits for the blocked read to return, so don't hold up the caller for it
+            Thread(target=response.close, daemon=True).start()
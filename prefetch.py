@@ -0,0 +1,107 @@
+# prefetch.py
+
+import os, time
+import metrics
+from concurrent.futures import ThreadPoolExecutor
+from cache_manifest import sha256_file
+from config import Config
+
+def display_resolution():
+    """Resolution of the first monitor, or None when there is no display"""
+    try:
+        from screeninfo import get_monitors
+        monitor = get_monitors()[0]
+        return monitor.width, monitor.height
+    except Exception:
+        return None
+
+def verify_cache(manifest, names):
+    """Drop cached files whose content no longer matches the manifest; returns how many"""
+    dropped = 0
+    for name in names:
+        entry = manifest.get(name)
+        if not entry:
+            continue
+        if not os.path.exists(entry["path"]) or sha256_file(entry["path"]) != entry["sha256"]:
+            print(f"Cached copy of {name} is missing or corrupt, fetching it again")
+            if os.path.exists(entry["path"]):
+                os.remove(entry["path"])
+            manifest.remove(name)
+            dropped += 1
+    return dropped
+
+def prefetch(media_manager, playlist_manager, resolution=None, workers=None):
+    """Fetch the latest playlist and fill the cache with everything it needs; returns a summary"""
+    started = time.monotonic()
+
+    playlist_id = playlist_manager.fetch_latest_playlist_id()
+    media_list = playlist_manager.fetch_media_list(playlist_id) if playlist_id else []
+    if media_list:
+        media_list = playlist_manager.save_playlist_data(playlist_id, media_list)
+    else:
+        print("Could not fetch the latest playlist, warming the cache from the saved one")
+        playlist_id, media_list = playlist_manager.load_playlist_data()
+        media_list = media_list or []
+
+    media_manager.display_size = resolution
+    media_manager.load_bundle(playlist_id)
+
+    image_urls, audio_urls = [], []
+    for media in media_list:
+        image_urls.extend(media.images)
+        if media.audio:
+            audio_urls.append(media.audio)
+    image_urls = list(dict.fromkeys(image_urls))
+    audio_urls = list(dict.fromkeys(audio_urls))
+
+    names = [url.split("/")[-1] for url in image_urls + audio_urls]
+    repaired = verify_cache(media_manager.manifest, names)
+
+    def fetch_image(url):
+        if resolution:
+            return media_manager.display_image(url)
+        return media_manager.get_bundled_asset(url) is not None or media_manager.download_image(url)
+
+    def fetch_audio(url):
+        if media_manager.get_audio_duration(url) is None:
+            return None
+        return url
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers or Config.PREFETCH_WORKERS) as pool:
+        jobs = [(url, pool.submit(fetch_image, url)) for url in image_urls]
+        jobs += [(url, pool.submit(fetch_audio, url)) for url in audio_urls]
+        for url, job in jobs:
+            try:
+                if not job.result():
+                    failed.append(url)
+            except Exception as e:
+                print(f"Error prefetching {url}: {e}")
+                failed.append(url)
+
+    media_manager.manifest.flush()  # One write for the whole pass
+
+    summary = {
+        "playlist_id": playlist_id,
+        "media_sets": len(media_list),
+        "images": len(image_urls),
+        "audio": len(audio_urls),
+        "repaired": repaired,
+        "failed": failed,
+        "downloads": media_manager.download_stats(),
+        "metrics": metrics.summary(),
+        "seconds": round(time.monotonic() - started, 1),
+    }
+
+    print(f"Prefetched playlist {playlist_id}: {len(media_list)} media sets, "
+          f"{len(image_urls)} images, {len(audio_urls)} audio clips in {summary['seconds']}s")
+    stats = summary["downloads"]
+    print(f"Downloads: {stats['transfers']} transferred, {stats['hits']} already cached, {stats['coalesced']} shared")
+    if resolution:
+        print(f"Display images prepared for {resolution[0]}x{resolution[1]}")
+    if repaired:
+        print(f"Replaced {repaired} corrupt or missing cached files")
+    for url in failed:
+        print(f"Failed: {url}")
+    metrics.report()
+    return summary
@@ -0,0 +1,110 @@
+# render_surface.py
+
+import time
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtGui import QPainter, QPixmap, QImage
+from PyQt5.QtCore import Qt, QTimer, QRect
+from config import Config
+import metrics
+
+class RenderSurface(QWidget):
+    """Paints frames from a device-resolution back buffer.
+
+    Each new frame is composed once into an off-screen pixmap the size of the widget
+    and swapped in, so showing an image never changes the widget's size or layout and
+    painting is a plain blit. The last image is kept so the buffer can be recomposed
+    if the widget is resized. Fades cross-blend the previous and new buffers, and fall
+    back to a cut when painting can't keep within the frame budget.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)  # Every paint covers the whole widget
+        self.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)  # Frames never drive layout
+
+        self.source = None  # Image on screen, kept to recompose the buffer on resize
+        self.front = None  # Buffer on screen
+        self.previous = None  # Buffer being faded out
+        self.fade_started = 0
+        self.fade_timer = QTimer(self)
+        self.fade_timer.setInterval(int(Config.FRAME_BUDGET_MS))
+        self.fade_timer.timeout.connect(self.update)
+
+    def show_frame(self, image, transition=None):
+        """Compose `image` (QImage or QPixmap) into a new back buffer and swap it in"""
+        started = time.perf_counter()
+        transition = transition or Config.TRANSITION
+
+        self.source = image
+        buffer = self._compose(image)
+        self.previous, self.front = self.front, buffer
+        if transition == "fade" and self.previous is not None:
+            self.fade_started = time.monotonic()
+            self.fade_timer.start()
+        else:
+            self.previous = None
+        self.update()
+
+        metrics.record("frame_swap_time", time.perf_counter() - started)
+
+    def _compose(self, image):
+        ratio = self.devicePixelRatioF()
+        buffer = QPixmap(self.size() * ratio)
+        buffer.setDevicePixelRatio(ratio)
+        buffer.fill(Qt.black)
+
+        # Fit the image once, here, instead of on every paint
+        target = QRect(0, 0, self.width(), self.height())
+        size = image.size().scaled(target.size(), Qt.KeepAspectRatio)
+        target = QRect(0, 0, size.width(), size.height())
+        target.moveCenter(self.rect().center())
+
+        painter = QPainter(buffer)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        if isinstance(image, QImage):
+            painter.drawImage(target, image)
+        else:
+            painter.drawPixmap(target, image)
+        painter.end()
+        return buffer
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.source is not None:
+            # Buffers of the old size would leave part of the widget unpainted
+            self.previous = None
+            self.fade_timer.stop()
+            self.front = self._compose(self.source)
+
+    def paintEvent(self, event):
+        started = time.perf_counter()
+        painter = QPainter(self)
+
+        if self.front is None:
+            painter.fillRect(self.rect(), Qt.black)
+            painter.end()
+            return
+        if self.front.size() != self.size() * self.front.devicePixelRatio():
+            painter.fillRect(self.rect(), Qt.black)  # Resized since the buffer was composed
+
+        progress = 1.0
+        if self.previous is not None:
+            progress = (time.monotonic() - self.fade_started) * 1000 / Config.TRANSITION_MS
+            if progress < 1.0:
+                painter.drawPixmap(0, 0, self.previous)
+                painter.setOpacity(progress)
+
+        painter.drawPixmap(0, 0, self.front)
+        painter.end()
+
+        paint_ms = (time.perf_counter() - started) * 1000
+        if self.previous is not None:
+            metrics.record("fade_frame_time", paint_ms / 1000)
+
+        # Finish the fade, or cut straight to the new frame if blending is too slow on this device
+        if progress >= 1.0 or paint_ms > Config.FRAME_BUDGET_MS:
+            if self.previous is not None:
+                self.previous = None
+                self.fade_timer.stop()
+                if progress < 1.0:
+                    self.update()
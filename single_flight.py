@@ -0,0 +1,42 @@
+# single_flight.py
+
+from threading import Event, Lock
+
+class _Call:
+    __slots__ = ("done", "result")
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers for that key share its result"""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.in_flight = {}
+        self.calls = 0  # Calls that did the work
+        self.coalesced = 0  # Calls that waited on someone else's
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.in_flight.get(key)
+            if call is None:
+                call = self.in_flight[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            call.done.set()
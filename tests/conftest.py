@@ -0,0 +1,8 @@
+# conftest.py
+
+import os, sys, tempfile
+
+# The modules live at the top of the repo and create their cache folders on import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("IMGCALL_DOWNLOADS_DIR", tempfile.mkdtemp(prefix="imgcall-tests-"))
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
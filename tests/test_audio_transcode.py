@@ -0,0 +1,32 @@
+# test_audio_transcode.py
+
+import os, wave, pygame
+from config import Config
+from audio_stream import matches_mixer
+from audio_transcode import transcode_for_mixer, cached_duration
+
+def write_tone(path, frequency=22050, channels=1, seconds=0.5):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(frequency)
+        w.writeframes(b"\x00\x10" * int(frequency * seconds) * channels)
+
+def test_transcode_writes_a_mixer_format_copy(tmp_path):
+    pygame.mixer.init(frequency=Config.MIXER_FREQUENCY, size=Config.MIXER_SIZE,
+                      channels=Config.MIXER_CHANNELS, buffer=Config.MIXER_BUFFER)
+    try:
+        source = str(tmp_path / "clip.wav")
+        write_tone(source)
+
+        path, duration = transcode_for_mixer("clip.wav", source)
+        assert path and os.path.exists(path)
+        assert matches_mixer(path)
+        assert abs(duration - 0.5) < 0.01
+        assert cached_duration(path) == duration
+        assert not [name for name in os.listdir(Config.TRANSCODE_DIR) if name.endswith(".tmp")]
+
+        # A second call reuses the cached copy
+        assert transcode_for_mixer("clip.wav", source) == (path, duration)
+    finally:
+        pygame.mixer.quit()
@@ -0,0 +1,37 @@
+# test_cache_manifest.py
+
+import json, os
+from cache_manifest import CacheManifest
+
+def add_file(manifest, tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return manifest.add(name, f"https://example.com/{name}", str(path))
+
+def test_saves_are_batched_until_flush(tmp_path):
+    manifest = CacheManifest(str(tmp_path / "manifest.json"))
+    for i in range(5):
+        add_file(manifest, tmp_path, f"{i}.png", b"x" * i)
+    assert not os.path.exists(manifest.path)
+
+    manifest.flush()
+    with open(manifest.path) as f:
+        assert sorted(json.load(f)) == [f"{i}.png" for i in range(5)]
+
+def test_snapshot_since_returns_only_changes(tmp_path):
+    manifest = CacheManifest(str(tmp_path / "manifest.json"))
+    add_file(manifest, tmp_path, "a.png", b"a")
+    add_file(manifest, tmp_path, "b.png", b"b")
+    first = manifest.snapshot()
+    assert first["full"] and sorted(first["entries"]) == ["a.png", "b.png"]
+
+    add_file(manifest, tmp_path, "c.png", b"c")
+    manifest.remove("a.png")
+    changes = manifest.snapshot(first["version"], first["epoch"])
+    assert not changes["full"]
+    assert changes["entries"]["a.png"] is None
+    assert sorted(changes["entries"]) == ["a.png", "c.png"]
+
+    # A version from another run of the process gets the whole manifest
+    assert manifest.snapshot(first["version"], "other")["full"]
+    manifest.flush()
@@ -0,0 +1,71 @@
+# test_playlist_notifier.py
+
+import json, queue, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from playlist_manager import PlaylistManager
+from playlist_notifier import PlaylistNotifier
+
+def start_stand_in(state, events):
+    """Local server answering the latest-playlist endpoint and a plain, unchunked event stream"""
+
+    class StandIn(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/latest":
+                body = json.dumps({"data": {"id": state["id"]}}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            self.wfile.write(b": connected\n\n")
+            self.wfile.flush()
+            while True:
+                self.wfile.write(f"data: {events.get()}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_pushed_change_arrives_promptly():
+    state, events = {"id": 1}, queue.Queue()
+    server, base = start_stand_in(state, events)
+
+    playlist_manager = PlaylistManager()
+    playlist_manager.latest_playlist_url = f"{base}/latest"
+    notifier = PlaylistNotifier(playlist_manager, events_url=f"{base}/events")
+    notifier.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not notifier.push_connected and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert notifier.push_connected, "event stream never connected"
+
+        # The starting ID is not a change
+        assert not notifier.changed.is_set()
+
+        state["id"] = 2
+        sent = time.monotonic()
+        events.put(json.dumps({"id": 2}))
+        assert notifier.changed.wait(5), "playlist change never arrived"
+        assert time.monotonic() - sent < 1
+        assert str(notifier.latest_id) == "2"
+    finally:
+        notifier.stop()
+        server.shutdown()
+
+def test_parse_event_formats():
+    assert PlaylistNotifier.parse_event("5") == 5
+    assert PlaylistNotifier.parse_event('"5"') == "5"
+    assert PlaylistNotifier.parse_event('{"id": 5}') == 5
+    assert PlaylistNotifier.parse_event('{"data": {"playlist_id": 7}}') == 7
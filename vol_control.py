@@ -85,11 +85,11 @@ class VolumeControlWidget(QWidget):
         volume = self.bg_slider.value() / 100.0
         print(f"Updated BG Volume to {volume}")
         self.viewer.bg_volume = self.bg_slider.value()  # Save state
-        self.media_manager.background_channel.set_volume(volume)
+        self.media_manager.set_background_level(volume)
         
 
     def update_media_volume(self):
         volume = self.media_slider.value() / 100.0
-        self.media_manager.media_channel.set_volume(volume)
+        self.media_manager.set_media_volume(volume)
         self.viewer.media_volume = self.media_slider.value()  # Save state
         print(f"Updated Media Volume to {volume}")